@@ -1,18 +1,30 @@
 #!/usr/bin/env python3
 """Download Rocket League car presets from bakkesplugins.com.
 
+Requires Python 3.10 or newer.
+
 This helper fetches the public car preset catalogue and writes it to the
 pipe-delimited format understood by the Expanded Presets plugin. Because the
 website is protected by Cloudflare, the script attempts to use the optional
 ``cloudscraper`` module when it is available. Without it you may receive HTTP
 403 errors; install the dependency via ``pip install cloudscraper`` if that
-happens.
+happens. When ``cloudscraper`` is not needed, installing ``httpx`` (ideally
+``pip install httpx[http2]``) switches to a pooled HTTP/2 client and lets
+``--details`` fetch preset details concurrently from a single asyncio event
+loop. API responses are decoded with ``orjson`` when it is installed, and with
+``ijson`` present catalogue pages are parsed incrementally while they download.
 
 The generated file contains one preset per line using the following schema:
 
     Name|LoadoutCode|primaryR,primaryG,primaryB|accentR,accentG,accentB|
     Car|Decal|Wheels|MatteFlag|PearlescentFlag
 
+API responses are cached in ``~/.cache/bakkesplugins`` so later runs only
+download what changed: catalogue pages and preset details are revalidated
+with their ``ETag``. Pass ``--refresh`` to start from an empty cache or
+``--no-cache`` to bypass it. If the cache cannot be opened the script warns and
+runs without it.
+
 Copy the resulting ``bakkesplugins_cars.cfg`` file into the
 ``bakkesmod/data/ExpandedPresets`` folder and run the
 ``expandedpresets_import_bakkesplugins`` console command (or click the
@@ -22,18 +34,49 @@ Copy the resulting ``bakkesplugins_cars.cfg`` file into the
 from __future__ import annotations
 
 import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
 import logging
+import sqlite3
+import stat
 import sys
+import threading
 import time
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Callable, Deque, Dict, Generator, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple, Type
 
 try:
     import cloudscraper  # type: ignore
 except ImportError:  # pragma: no cover - dependency is optional
     cloudscraper = None  # type: ignore
 
+try:
+    import httpx  # type: ignore
+except ImportError:  # pragma: no cover - dependency is optional
+    httpx = None  # type: ignore
+
+# httpx only needs h2 to be importable to negotiate HTTP/2.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Likewise httpx decodes ``br`` bodies whenever brotli is installed.
+ACCEPT_ENCODING = "gzip, deflate, br" if importlib.util.find_spec("brotli") is not None else "gzip, deflate"
+
+try:
+    import ijson  # type: ignore
+except ImportError:  # pragma: no cover - dependency is optional
+    ijson = None  # type: ignore
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - dependency is optional
+    orjson = None  # type: ignore
+
 try:
     import requests
 except ImportError as exc:  # pragma: no cover - requests should always exist
@@ -43,9 +86,73 @@ LOGGER = logging.getLogger("bakkesplugins")
 BASE_URL = "https://bakkesplugins.com"
 CATALOG_ENDPOINT = f"{BASE_URL}/api/presets"
 DETAIL_ENDPOINT = f"{BASE_URL}/api/presets/{{slug}}"
+CATALOG_WORKERS = 8
+DETAIL_CONCURRENCY = 16
+DETAIL_WINDOW = 256
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "bakkesplugins"
+STREAM_CHUNK_SIZE = 64 * 1024
+CATALOG_ENTRY_PREFIXES = ("data.item", "results.item")
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/119.0 Safari/537.36"
+    ),
+    "Accept": "application/json, text/plain, */*",
+}
+HTTP_STATUS_ERRORS: Tuple[Type[BaseException], ...] = (requests.HTTPError,)
+if httpx is not None:  # pragma: no cover - optional dependency
+    HTTP_STATUS_ERRORS += (httpx.HTTPStatusError,)
+
+
+class HttpSession(Protocol):
+    """The part of ``requests.Session`` / ``httpx.Client`` this script relies on."""
+
+    def get(
+        self, url: str, *, params: Optional[dict] = None, headers: Optional[dict] = None, timeout: float = ...
+    ) -> Any:
+        ...
+
+
+class ResponseCache:
+    """SQLite store of raw API response bodies keyed by request, with their ETags.
+
+    A single connection is shared by the fetch threads and guarded by a lock.
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, etag TEXT, body BLOB NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[Tuple[Optional[str], bytes]]:
+        with self._lock:
+            row = self._db.execute("SELECT etag, body FROM responses WHERE key = ?", (key,)).fetchone()
+        return None if row is None else (row[0], bytes(row[1]))
+
+    def put(self, key: str, etag: Optional[str], body: bytes) -> None:
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, etag, body))
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
 
 
-@dataclass
+# Name|Loadout|primary RGB|accent RGB|Car|Decal|Wheels|Matte|Pearlescent
+CFG_LINE_FORMAT = "%s|%s|%.3f,%.3f,%.3f|%.3f,%.3f,%.3f|%s|%s|%s|%d|%d"
+
+
+@dataclass(frozen=True, slots=True)
 class Preset:
     name: str
     loadout: str
@@ -56,43 +163,49 @@ class Preset:
     wheels: str
     matte: bool
     pearlescent: bool
+    _line: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Presets are immutable, so the cfg line is rendered exactly once.
+        line = CFG_LINE_FORMAT % (
+            self.name.replace("|", "/"),
+            self.loadout.strip(),
+            *self.primary_color,
+            *self.accent_color,
+            self.car.replace("|", "/"),
+            self.decal.replace("|", "/"),
+            self.wheels.replace("|", "/"),
+            self.matte,
+            self.pearlescent,
+        )
+        object.__setattr__(self, "_line", line)
 
     def to_cfg_line(self) -> str:
-        def fmt(color: Tuple[float, float, float]) -> str:
-            r, g, b = color
-            return f"{r:.3f},{g:.3f},{b:.3f}"
-
-        return "|".join(
-            [
-                self.name.replace("|", "/"),
-                self.loadout.strip(),
-                fmt(self.primary_color),
-                fmt(self.accent_color),
-                self.car.replace("|", "/"),
-                self.decal.replace("|", "/"),
-                self.wheels.replace("|", "/"),
-                "1" if self.matte else "0",
-                "1" if self.pearlescent else "0",
-            ]
-        )
+        return self._line
+
 
+def httpx_options(max_connections: int) -> Dict[str, Any]:
+    """Client settings shared by the sync and async httpx clients."""
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "headers": {**DEFAULT_HEADERS, "Accept-Encoding": ACCEPT_ENCODING},
+        "limits": httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        "follow_redirects": True,
+        "timeout": 30,
+    }
 
-def create_session() -> requests.Session:
+
+def create_session() -> HttpSession:
     if cloudscraper is not None:  # pragma: no cover - optional dependency
         LOGGER.debug("Using cloudscraper session")
         return cloudscraper.create_scraper()
 
+    if httpx is not None:  # pragma: no cover - optional dependency
+        LOGGER.debug("Using httpx client (HTTP/2: %s)", HTTP2_AVAILABLE)
+        return httpx.Client(**httpx_options(max(CATALOG_WORKERS, DETAIL_CONCURRENCY)))
+
     session = requests.Session()
-    session.headers.update(
-        {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/119.0 Safari/537.36"
-            ),
-            "Accept": "application/json, text/plain, */*",
-        }
-    )
+    session.headers.update(DEFAULT_HEADERS)
     return session
 
 
@@ -100,18 +213,39 @@ def clamp_color(value: Optional[float]) -> float:
     if value is None:
         return 0.0
     value = float(value)
-    return max(0.0, min(1.0, value / 255.0 if value > 1 else value))
+    if value > 1:
+        value /= 255.0
+    # Plain comparisons instead of min()/max() calls; NaN still clamps to 1.0.
+    if 0.0 <= value <= 1.0:
+        return value
+    return 0.0 if value < 0.0 else 1.0
 
 
-def parse_color(data: object, fallback: Tuple[float, float, float]) -> Tuple[float, float, float]:
-    if isinstance(data, Sequence) and len(data) >= 3:
-        return tuple(clamp_color(float(component)) for component in data[:3])  # type: ignore[arg-type]
+RED_KEYS = ("r", "red", "R")
+GREEN_KEYS = ("g", "green", "G")
+BLUE_KEYS = ("b", "blue", "B")
+
+
+def _pick(data: dict, keys: Tuple[str, ...]) -> Any:
+    """Return the value of the first key present, so a legitimate 0 is kept."""
+    for key in keys:
+        value = data.get(key)
+        if value is not None:
+            return value
+    return None
 
+
+def parse_color(data: object, fallback: Tuple[float, float, float]) -> Tuple[float, float, float]:
+    # dict is the common API shape and much cheaper to test than the Sequence ABC.
     if isinstance(data, dict):
-        r = clamp_color(data.get("r") or data.get("red") or data.get("R"))
-        g = clamp_color(data.get("g") or data.get("green") or data.get("G"))
-        b = clamp_color(data.get("b") or data.get("blue") or data.get("B"))
-        return r, g, b
+        return (
+            clamp_color(_pick(data, RED_KEYS)),
+            clamp_color(_pick(data, GREEN_KEYS)),
+            clamp_color(_pick(data, BLUE_KEYS)),
+        )
+
+    if isinstance(data, Sequence) and len(data) >= 3:
+        return tuple(map(clamp_color, data[:3]))  # type: ignore[return-value]
 
     return fallback
 
@@ -168,80 +302,442 @@ def normalise_preset(raw: dict) -> Optional[Preset]:
     )
 
 
-def fetch_catalog_page(session: requests.Session, page: int, page_size: int) -> dict:
+def parse_json(body: bytes) -> object:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode_json(response: Any) -> object:
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def _catalog_request(
+    page: int, page_size: int, cache: Optional[ResponseCache]
+) -> Tuple[dict, str, Optional[Tuple[Optional[str], bytes]], Optional[dict]]:
     params = {"type": "cars", "perPage": page_size, "page": page}
-    LOGGER.debug("Fetching catalog page %s", page)
-    response = session.get(CATALOG_ENDPOINT, params=params, timeout=30)
+    key = f"catalog:{page_size}:{page}"
+    cached = cache.get(key) if cache is not None else None
+    headers = {"If-None-Match": cached[0]} if cached is not None and cached[0] else None
+    return params, key, cached, headers
+
+
+def _check_catalog_response(response: Any) -> None:
     if response.status_code == 403:
         raise RuntimeError(
             "Access denied by bakkesplugins.com. Install 'cloudscraper' or "
             "run the script with a VPN/standard browser session."
         )
     response.raise_for_status()
-    return response.json()
 
 
-def iter_catalog(session: requests.Session, limit: Optional[int], page_size: int, sleep: float) -> Iterable[dict]:
-    page = 1
+def fetch_catalog_page(
+    session: HttpSession, page: int, page_size: int, cache: Optional[ResponseCache] = None
+) -> dict:
+    params, key, cached, headers = _catalog_request(page, page_size, cache)
+    LOGGER.debug("Fetching catalog page %s", page)
+    response = session.get(CATALOG_ENDPOINT, params=params, headers=headers, timeout=30)
+    if response.status_code == 304 and cached is not None:
+        LOGGER.debug("Catalog page %s not modified, using cached copy", page)
+        return parse_json(cached[1])  # type: ignore[return-value]
+    _check_catalog_response(response)
+    etag = response.headers.get("ETag")
+    if cache is not None and etag:
+        cache.put(key, etag, response.content)
+    return decode_json(response)  # type: ignore[return-value]
+
+
+@contextmanager
+def open_stream(session: HttpSession, url: str, params: dict, headers: Optional[dict]) -> Iterator[Any]:
+    """Issue a GET whose body is read lazily, for either requests or httpx sessions."""
+    if httpx is not None and isinstance(session, httpx.Client):  # pragma: no cover - optional dependency
+        with session.stream("GET", url, params=params, headers=headers, timeout=30) as response:
+            yield response
+        return
+    response = session.get(url, params=params, headers=headers, timeout=30, stream=True)  # type: ignore[call-arg]
+    try:
+        yield response
+    finally:
+        response.close()
+
+
+def iter_body(response: Any) -> Iterator[bytes]:
+    if httpx is not None and isinstance(response, httpx.Response):  # pragma: no cover - optional dependency
+        return response.iter_bytes(STREAM_CHUNK_SIZE)
+    return response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+
+
+def iter_json_entries(chunks: Iterable[bytes]) -> Iterator[dict]:
+    """Yield catalogue entries from a JSON body as soon as each one is complete.
+
+    Like :func:`catalog_entries`, ``results`` items are only used when ``data`` is
+    missing or empty. They stream once ``data`` has ended empty; until then they
+    are held back, and dropped as soon as ``data`` turns out to have items.
+    """
+    events = ijson.sendable_list()
+    parser = ijson.parse_coro(events, use_float=True)
+    builder = None
+    item_prefix = ""
+    # ``results`` items waiting on ``data``; None once ``data`` has an item.
+    held: Optional[List[dict]] = []
+    data_ended = False
+    # A trailing None marks the end of the body so the parser can be closed.
+    for chunk in itertools.chain(chunks, [None]):
+        if chunk is None:
+            parser.close()
+        elif chunk:
+            parser.send(chunk)
+        for prefix, event, value in events:
+            if builder is None:
+                if prefix == "data.item":
+                    held = None
+                if prefix in CATALOG_ENTRY_PREFIXES and event == "start_map":
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                    item_prefix = prefix
+                elif prefix == "data" and event in ("end_array", "null"):
+                    data_ended = True
+                    if held:
+                        yield from held
+                        held.clear()
+                continue
+            builder.event(event, value)
+            if prefix == item_prefix and event == "end_map":
+                entry = builder.value
+                builder = None
+                if item_prefix == "data.item" or (held is not None and data_ended):
+                    yield entry
+                elif held is not None:
+                    held.append(entry)
+        del events[:]
+    if held:
+        yield from held
+
+
+def _record(chunks: Iterable[bytes], sink: Callable[[bytes], None]) -> Iterator[bytes]:
+    for chunk in chunks:
+        sink(chunk)
+        yield chunk
+
+
+def iter_catalog_page(
+    session: HttpSession, page: int, page_size: int, cache: Optional[ResponseCache] = None
+) -> Iterator[dict]:
+    """Yield the entries of one catalogue page, parsing the body as it streams in.
+
+    Falls back to :func:`fetch_catalog_page` when ``ijson`` is not installed.
+    """
+    if ijson is None:
+        yield from catalog_entries(fetch_catalog_page(session, page, page_size, cache))
+        return
+
+    params, key, cached, headers = _catalog_request(page, page_size, cache)
+    LOGGER.debug("Streaming catalog page %s", page)
+    body: Optional[List[bytes]] = None
+    with open_stream(session, CATALOG_ENDPOINT, params, headers) as response:
+        if response.status_code == 304 and cached is not None:
+            LOGGER.debug("Catalog page %s not modified, using cached copy", page)
+            yield from catalog_entries(parse_json(cached[1]))  # type: ignore[arg-type]
+            return
+        _check_catalog_response(response)
+        etag = response.headers.get("ETag")
+        chunks: Iterable[bytes] = iter_body(response)
+        if cache is not None and etag:
+            # The cache stores whole bodies, so keep the chunks while streaming.
+            body = []
+            chunks = _record(chunks, body.append)
+        yield from iter_json_entries(chunks)
+    if body is not None and cache is not None:
+        cache.put(key, etag, b"".join(body))
+
+
+class RateLimiter:
+    """Space request start times at least ``interval`` seconds apart across threads."""
+
+    def __init__(self, interval: float) -> None:
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic() + interval
+
+    def wait(self) -> None:
+        if self._interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def catalog_entries(data: dict) -> Sequence[dict]:
+    return data.get("data") or data.get("results") or []  # type: ignore[return-value]
+
+
+def iter_catalog(
+    session: HttpSession,
+    limit: Optional[int],
+    page_size: int,
+    sleep: float,
+    workers: int = CATALOG_WORKERS,
+    cache: Optional[ResponseCache] = None,
+) -> Iterable[dict]:
+    # The first page tells us how many pages exist; the rest are fetched concurrently.
+    data = fetch_catalog_page(session, 1, page_size, cache)
+    entries = catalog_entries(data)
+    meta = data.get("meta") or {}
+    last_page = int(meta.get("last_page") or meta.get("lastPage") or 1)
+    LOGGER.info("Fetched %d entries from page %d/%s", len(entries), 1, last_page)
+    if limit is not None and entries:
+        last_page = min(last_page, -(-limit // len(entries)))
+
     fetched = 0
-    last_page: Optional[int] = None
-
-    while True:
-        data = fetch_catalog_page(session, page, page_size)
-        entries: Sequence[dict] = data.get("data") or data.get("results") or []  # type: ignore[assignment]
-        meta = data.get("meta") or {}
-        if last_page is None:
-            last_page = int(meta.get("last_page") or meta.get("lastPage") or page)
-        LOGGER.info("Fetched %d entries from page %d/%s", len(entries), page, last_page)
-
-        for entry in entries:
-            yield entry
-            fetched += 1
-            if limit is not None and fetched >= limit:
-                return
-
-        page += 1
-        if last_page is not None and page > last_page:
-            break
-        if sleep > 0:
-            time.sleep(sleep)
-
-
-def enrich_entry(session: requests.Session, entry: dict) -> dict:
+    for entry in entries:
+        yield entry
+        fetched += 1
+        if limit is not None and fetched >= limit:
+            return
+
+    limiter = RateLimiter(sleep)
+
+    def stream(page: int) -> Iterator[dict]:
+        limiter.wait()
+        yield from iter_catalog_page(session, page, page_size, cache)
+
+    workers = max(1, workers)
+    pages = range(2, last_page + 1)
+    if workers == 1:
+        # Without concurrency each page is parsed while it is still arriving.
+        page_entries: Generator[Tuple[int, Iterable[dict]], None, None] = (
+            (page, stream(page)) for page in pages
+        )
+    else:
+        page_entries = _prefetch_pages(lambda page: list(stream(page)), pages, workers)
+
+    with closing(page_entries):
+        for page, page_items in page_entries:
+            count = 0
+            for entry in page_items:
+                yield entry
+                count += 1
+                fetched += 1
+                if limit is not None and fetched >= limit:
+                    return
+            LOGGER.info("Fetched %d entries from page %d/%s", count, page, last_page)
+
+
+def _prefetch_pages(
+    fetch: Callable[[int], List[dict]], pages: Iterable[int], workers: int
+) -> Generator[Tuple[int, List[dict]], None, None]:
+    """Fetch pages on a thread pool, keeping ``workers`` in flight, yielding them in order."""
+    pending_pages = iter(pages)
+    window: Deque[Tuple[int, Future]] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for page in itertools.islice(pending_pages, workers):
+                window.append((page, executor.submit(fetch, page)))
+            while window:
+                page, future = window.popleft()
+                entries = future.result()
+                next_page = next(pending_pages, None)
+                if next_page is not None:
+                    window.append((next_page, executor.submit(fetch, next_page)))
+                yield page, entries
+        finally:
+            for _, pending in window:
+                pending.cancel()
+
+
+def _detail_request(
+    slug: str, cache: Optional[ResponseCache]
+) -> Tuple[str, Optional[Tuple[Optional[str], bytes]], Optional[dict]]:
+    key = f"detail:{slug}"
+    cached = cache.get(key) if cache is not None else None
+    headers = {"If-None-Match": cached[0]} if cached is not None and cached[0] else None
+    return key, cached, headers
+
+
+def _read_details(
+    response: Any, key: str, cached: Optional[Tuple[Optional[str], bytes]], cache: Optional[ResponseCache]
+) -> object:
+    # httpx raises for every non-2xx status, so a 304 must be handled first.
+    if response.status_code == 304 and cached is not None:
+        return parse_json(cached[1])
+    response.raise_for_status()
+    etag = response.headers.get("ETag")
+    if cache is not None and etag:
+        cache.put(key, etag, response.content)
+    return decode_json(response)
+
+
+def enrich_entry(session: HttpSession, entry: dict, cache: Optional[ResponseCache] = None) -> dict:
     slug = entry.get("slug") or entry.get("uuid")
     if not slug:
         return entry
+    key, cached, headers = _detail_request(slug, cache)
     try:
-        response = session.get(DETAIL_ENDPOINT.format(slug=slug), timeout=30)
-        response.raise_for_status()
-        details = response.json()
+        response = session.get(DETAIL_ENDPOINT.format(slug=slug), headers=headers, timeout=30)
+        details = _read_details(response, key, cached, cache)
         if isinstance(details, dict):
             entry = {**details, **entry}
-    except requests.HTTPError as exc:
+    except HTTP_STATUS_ERRORS as exc:
         LOGGER.warning("Failed to fetch detail for %s: %s", slug, exc)
     return entry
 
 
-def build_presets(session: requests.Session, raw_entries: Iterable[dict], fetch_details: bool) -> List[Preset]:
-    presets: List[Preset] = []
-    for raw in raw_entries:
-        if fetch_details:
-            raw = enrich_entry(session, raw)
+async def _fetch_details(
+    client: "httpx.AsyncClient", semaphore: asyncio.Semaphore, slug: str, cache: Optional[ResponseCache]
+) -> Optional[dict]:
+    key, cached, headers = _detail_request(slug, cache)
+    async with semaphore:
+        try:
+            response = await client.get(DETAIL_ENDPOINT.format(slug=slug), headers=headers, timeout=30)
+            details = _read_details(response, key, cached, cache)
+        except httpx.HTTPStatusError as exc:
+            LOGGER.warning("Failed to fetch detail for %s: %s", slug, exc)
+            return None
+    return details if isinstance(details, dict) else None
+
+
+class AsyncDetailFetcher:
+    """Fetch details on one background event loop sharing a single ``httpx.AsyncClient``."""
+
+    def __init__(self, concurrency: int, cache: Optional[ResponseCache] = None) -> None:
+        self._cache = cache
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="bakkesplugins-details", daemon=True)
+        self._thread.start()
+        self._client, self._semaphore = self._run(self._open(concurrency))
+
+    @staticmethod
+    async def _open(concurrency: int) -> Tuple["httpx.AsyncClient", asyncio.Semaphore]:
+        return httpx.AsyncClient(**httpx_options(concurrency)), asyncio.Semaphore(concurrency)
+
+    def _run(self, coro: Any) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _enrich(self, entry: dict) -> dict:
+        slug = entry.get("slug") or entry.get("uuid")
+        if not slug:
+            return entry
+        details = await _fetch_details(self._client, self._semaphore, slug, self._cache)
+        return entry if details is None else {**details, **entry}
+
+    def submit(self, entry: dict) -> Future:
+        return asyncio.run_coroutine_threadsafe(self._enrich(entry), self._loop)
+
+    def close(self) -> None:
+        try:
+            self._run(self._client.aclose())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+
+class ThreadedDetailFetcher:
+    """Fetch details through the sync session on a thread pool."""
+
+    def __init__(self, session: HttpSession, concurrency: int, cache: Optional[ResponseCache] = None) -> None:
+        self._session = session
+        self._cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def submit(self, entry: dict) -> Future:
+        return self._executor.submit(enrich_entry, self._session, entry, self._cache)
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+
+def _enrich_in_order(
+    session: HttpSession, raw_entries: Iterable[dict], concurrency: int, cache: Optional[ResponseCache]
+) -> Generator[dict, None, None]:
+    """Enrich entries through one fetcher for the whole run, keeping ``DETAIL_WINDOW`` in flight, in order."""
+    concurrency = max(1, concurrency)
+    fetcher: Any
+    if httpx is not None and cloudscraper is None:
+        fetcher = AsyncDetailFetcher(concurrency, cache)
+    else:
+        # cloudscraper sessions carry the Cloudflare clearance, so keep using the sync session.
+        fetcher = ThreadedDetailFetcher(session, concurrency, cache)
+
+    pending_entries = iter(raw_entries)
+    window: Deque[Future] = deque()
+    try:
+        for entry in itertools.islice(pending_entries, DETAIL_WINDOW):
+            window.append(fetcher.submit(entry))
+        while window:
+            future = window.popleft()
+            next_entry = next(pending_entries, None)
+            if next_entry is not None:
+                window.append(fetcher.submit(next_entry))
+            yield future.result()
+    finally:
+        for pending in window:
+            pending.cancel()
+        fetcher.close()
+
+
+def iter_presets(
+    session: HttpSession,
+    raw_entries: Iterable[dict],
+    fetch_details: bool,
+    concurrency: int = DETAIL_CONCURRENCY,
+    cache: Optional[ResponseCache] = None,
+) -> Iterator[Preset]:
+    entries: Iterable[dict] = raw_entries
+    if fetch_details:
+        entries = _enrich_in_order(session, raw_entries, concurrency, cache)
+
+    for raw in entries:
         preset = normalise_preset(raw)
         if preset is None:
             LOGGER.debug("Skipping entry without loadout code: %s", raw.get("slug") or raw.get("name"))
             continue
-        presets.append(preset)
-    return presets
+        yield preset
 
 
-def write_presets(presets: Sequence[Preset], output_path: Path) -> None:
+def _is_special_file(path: Path) -> bool:
+    try:
+        return not stat.S_ISREG(path.stat().st_mode)
+    except FileNotFoundError:
+        return False
+
+
+def write_presets(presets: Iterable[Preset], output_path: Path) -> int:
+    """Stream ``presets`` to ``output_path`` and return how many were written.
+
+    Regular files are written through a ``.part`` file next to the destination,
+    which only replaces it once every preset has been written, so an interrupted
+    run leaves any previous catalogue untouched. Pipes, terminals and devices
+    such as ``/dev/stdout`` cannot be swapped by a rename and are written in place.
+    """
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", encoding="utf-8") as file:
+    # Resolve symlinks so the rename replaces the file they point at, not the link.
+    target = None if _is_special_file(output_path) else output_path.resolve()
+    partial_path = output_path if target is None else target.with_name(target.name + ".part")
+    count = 0
+
+    def lines() -> Iterator[str]:
+        nonlocal count
         for preset in presets:
-            file.write(preset.to_cfg_line())
-            file.write("\n")
-    LOGGER.info("Wrote %d presets to %s", len(presets), output_path)
+            count += 1
+            yield preset.to_cfg_line() + "\n"
+
+    with partial_path.open("w", encoding="utf-8") as file:
+        # One writelines() call; the text layer batches the lines into buffered writes.
+        file.writelines(lines())
+    if target is not None:
+        if count:
+            partial_path.replace(target)
+        else:
+            partial_path.unlink()
+    if count:
+        LOGGER.info("Wrote %d presets to %s", count, output_path)
+    return count
 
 
 def parse_args(argv: Sequence[str]) -> argparse.Namespace:
@@ -249,29 +745,71 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
     parser.add_argument("--output", type=Path, default=Path("bakkesplugins_cars.cfg"), help="Destination file")
     parser.add_argument("--limit", type=int, default=None, help="Maximum presets to download (for testing)")
     parser.add_argument("--page-size", type=int, default=100, help="Number of presets to request per page")
-    parser.add_argument("--sleep", type=float, default=0.75, help="Delay between page requests to avoid rate limits")
+    parser.add_argument("--sleep", type=float, default=0.75, help="Minimum delay between page requests to avoid rate limits")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=CATALOG_WORKERS,
+        help="Maximum number of catalog pages fetched concurrently",
+    )
     parser.add_argument(
         "--details",
         action="store_true",
         help="Fetch individual preset details to obtain full loadout data",
     )
+    parser.add_argument(
+        "--detail-concurrency",
+        type=int,
+        default=DETAIL_CONCURRENCY,
+        help="Maximum number of preset detail requests in flight when --details is set",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory holding the API response cache (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the response cache")
+    parser.add_argument("--refresh", action="store_true", help="Discard cached responses before downloading")
     parser.add_argument("--log-level", default="INFO", help="Logging level (DEBUG, INFO, WARNING, ...)")
     return parser.parse_args(argv)
 
 
+def open_cache(path: Path, refresh: bool) -> Optional[ResponseCache]:
+    """Open (and with ``refresh`` empty) the response cache, or return ``None`` if that fails."""
+    cache: Optional[ResponseCache] = None
+    try:
+        cache = ResponseCache(path)
+        if refresh:
+            cache.clear()
+    except (OSError, sqlite3.Error) as exc:
+        LOGGER.warning("Response cache %s is unavailable, continuing without it: %s", path, exc)
+        if cache is not None:
+            cache.close()
+        return None
+    return cache
+
+
 def main(argv: Sequence[str]) -> int:
     args = parse_args(argv)
     logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO), format="%(levelname)s: %(message)s")
+    if args.log_level.upper() != "DEBUG":
+        # httpx logs every request at INFO, which drowns out our own progress messages.
+        for name in ("httpx", "httpcore"):
+            logging.getLogger(name).setLevel(logging.WARNING)
 
-    session = create_session()
-    raw_entries = list(iter_catalog(session, args.limit, args.page_size, args.sleep))
-    presets = build_presets(session, raw_entries, args.details)
-    if not presets:
-        LOGGER.error("No presets were downloaded. Check your connection or API changes.")
-        return 1
-
-    write_presets(presets, args.output)
-    return 0
+    cache = None if args.no_cache else open_cache(args.cache_dir / "responses.sqlite3", args.refresh)
+    try:
+        session = create_session()
+        raw_entries = iter_catalog(session, args.limit, args.page_size, args.sleep, args.workers, cache)
+        presets = iter_presets(session, raw_entries, args.details, args.detail_concurrency, cache)
+        if not write_presets(presets, args.output):
+            LOGGER.error("No presets were downloaded. Check your connection or API changes.")
+            return 1
+        return 0
+    finally:
+        if cache is not None:
+            cache.close()
 
 
 if __name__ == "__main__":